@@ -5,32 +5,115 @@
 """
 
 import numpy as np
+import pandas as pd
 from typing import Any
 import QuantSpace.libs.qlmisc as qlmisc
 import QuantSpace.libs.qlyield as qlyield
 import QuantSpace.libs.qloptions as qloptions
 import QuantSpace.libs.qlvolsurface as qlvolsurface
+import QuantSpace.libs.registry as registry
+
+DEFAULT_STEPS = 100
+
+
+def _s(x: Any):
+    """
+        Unwrap a single cell Excel range into a Python scalar.
+    :param x: 1x1 numpy array or scalar
+    :return: Python scalar
+    """
+    return x.item() if isinstance(x, np.ndarray) else x
+
+
+def _steps(steps: np.ndarray):
+    """
+        Number of binomial tree steps, defaulting when the range was not supplied.
+    :param steps: 1x1 numpy array or None
+    :return: Number of steps
+    """
+    return DEFAULT_STEPS if steps is None else int(_s(steps))
 
 
 class QuantSpaceContext(object):
 
+    @staticmethod
+    def handle(obj: Any):
+        """
+            Register a curve, surface or other object and return a string handle for it.
+            Handles can be passed wherever a volatility, yield curve or surface is expected.
+        :param obj: Object to register
+        :return: String handle of the object
+        """
+        return registry.register(obj)
+
     @staticmethod
     def comdty_vanilla_option(evaluation_date: np.ndarray, expiry_date: np.ndarray, forward_price: np.ndarray, strike_price: np.ndarray, option_type: np.ndarray, exercise_type: np.ndarray,
-                              volatility: Any, yield_curve: Any, steps: np.ndarray = np.array([[100]])):
+                              volatility: Any, yield_curve: Any, steps: np.ndarray = None):
         """
             Calculate the price of a commodity vanilla option.
+            Several strikes and/or expiries are priced in one call, European options by vectorised Black-76 and American
+            options by the parallel binomial batch, with one column per strike and expiry.
         :param evaluation_date:  Date of evaluation
         :param expiry_date: Date of expiry
         :param forward_price: Forward price of the underlying asset
         :param strike_price: Strike price of the option
         :param option_type: 'CALL' or 'PUT'
         :param exercise_type: 'EUROPEAN' or 'AMERICAN'
-        :param steps: Number of steps for the binomial tree (only for American options)
+        :param steps: Number of steps for the binomial tree (only for American options), 100 if not given
         :param volatility: Volatility term structure
         :param yield_curve: Yield term structure
-        :return: DataFrame with option price, delta, gamma, theta, vega, rho
+        :return: DataFrame with option price, delta, gamma, theta, vega, rho, one column per option
         """
-        return qloptions.comdty_vanilla_option(evaluation_date[0, 0], expiry_date[0, 0], forward_price[0, 0], strike_price[0, 0], option_type[0, 0], exercise_type[0, 0], steps[0, 0], volatility, yield_curve)
+        if strike_price.size > 1 or expiry_date.size > 1:
+            expiry_dates, strike_prices = np.broadcast_arrays(expiry_date, strike_price)
+            columns = [f'{_s(option_type)} {strike:g} {pd.Timestamp(expiry):%d/%m/%Y}' for expiry, strike in zip(expiry_dates.flat, strike_prices.flat)]
+            if _s(exercise_type).upper() != 'AMERICAN':
+                result = qloptions.comdty_vanilla_option_chain(_s(evaluation_date), expiry_dates, _s(forward_price), strike_prices, _s(option_type), registry.resolve(volatility), registry.resolve(yield_curve))
+                return pd.DataFrame([values.ravel() for values in result.values()], columns=columns, index=list(result.keys()))
+            result = qloptions.comdty_vanilla_option_batch(_s(evaluation_date), expiry_dates, _s(forward_price), strike_prices, _s(option_type), _s(exercise_type), _steps(steps), registry.resolve(volatility),
+                                                           registry.resolve(yield_curve))
+            return pd.DataFrame(result.values.T, columns=columns, index=result.columns)
+        return qloptions.comdty_vanilla_option(_s(evaluation_date), _s(expiry_date), _s(forward_price), _s(strike_price), _s(option_type), _s(exercise_type), _steps(steps), registry.resolve(volatility), registry.resolve(yield_curve))
+
+    @staticmethod
+    def comdty_vanilla_option_greeks(evaluation_date: np.ndarray, expiry_date: np.ndarray, forward_price: np.ndarray, strike_price: np.ndarray, option_type: np.ndarray, exercise_type: np.ndarray,
+                                     volatility: Any, yield_curve: Any, steps: np.ndarray = None):
+        """
+            Calculate the price and greeks of a single commodity vanilla option without building a DataFrame.
+        :param evaluation_date:  Date of evaluation
+        :param expiry_date: Date of expiry
+        :param forward_price: Forward price of the underlying asset
+        :param strike_price: Strike price of the option
+        :param option_type: 'CALL' or 'PUT'
+        :param exercise_type: 'EUROPEAN' or 'AMERICAN'
+        :param volatility: Volatility term structure
+        :param yield_curve: Yield term structure
+        :param steps: Number of steps for the binomial tree (only for American options), 100 if not given
+        :return: Column array with option price, delta, gamma, theta, vega, rho
+        """
+        greeks = qloptions.comdty_vanilla_option_greeks(_s(evaluation_date), _s(expiry_date), _s(forward_price), _s(strike_price), _s(option_type), _s(exercise_type), _steps(steps),
+                                                        registry.resolve(volatility), registry.resolve(yield_curve))
+        return np.array(greeks).reshape(-1, 1)
+
+    @staticmethod
+    def comdty_vanilla_option_batch(evaluation_date: np.ndarray, expiry_date: np.ndarray, forward_price: np.ndarray, strike_price: np.ndarray, option_type: np.ndarray, exercise_type: np.ndarray,
+                                    volatility: Any, yield_curve: Any, steps: np.ndarray = None, contract_id: np.ndarray = None):
+        """
+            Calculate the prices of a portfolio of commodity vanilla options, one option per row.
+        :param evaluation_date: Date of evaluation
+        :param expiry_date: Dates of expiry
+        :param forward_price: Forward prices of the underlying assets
+        :param strike_price: Strike prices of the options
+        :param option_type: 'CALL' or 'PUT' per option
+        :param exercise_type: 'EUROPEAN' or 'AMERICAN' per option
+        :param volatility: Volatility term structure
+        :param yield_curve: Yield term structure
+        :param steps: Number of steps for the binomial tree (only for American options), 100 if not given
+        :param contract_id: Identifier per option used to label the rows, row numbers if not given
+        :return: DataFrame with one row per option and columns price, delta, gamma, theta, vega, rho
+        """
+        return qloptions.comdty_vanilla_option_batch(_s(evaluation_date), expiry_date, forward_price, strike_price, option_type, exercise_type, DEFAULT_STEPS if steps is None else steps, registry.resolve(volatility), registry.resolve(yield_curve),
+                                                     contract_id)
 
     @staticmethod
     def comdty_vanilla_option_delta(evaluation_date: np.ndarray, expiry_date: np.ndarray, forward_price: np.ndarray, delta: np.ndarray, option_type: np.ndarray, volatility: Any, yield_curve: Any):
@@ -46,11 +129,12 @@ class QuantSpaceContext(object):
         :return: DataFrame with option price, delta, gamma, theta, vega, rho, derived strike price
                 and helper values like d1, risk-free rate, atm volatility, years_to_maturity
         """
-        return qloptions.comdty_vanilla_option_delta(evaluation_date[0, 0], expiry_date[0, 0], forward_price[0, 0], delta[0, 0], option_type[0, 0], volatility, yield_curve)
+        return qloptions.comdty_vanilla_option_delta(_s(evaluation_date), _s(expiry_date), _s(forward_price), _s(delta), _s(option_type), registry.resolve(volatility), registry.resolve(yield_curve))
 
     @staticmethod
     def comdty_vanilla_option_calendar_spread(evaluation_date: np.ndarray, expiry_date_long: np.ndarray, expiry_date_short: np.ndarray, forward_price: np.ndarray, strike_price: np.ndarray, option_type: np.ndarray,
-                                              correlation: np.ndarray, volatility: Any, yield_curve: Any, paths: np.ndarray):
+                                              correlation: np.ndarray, volatility: Any, yield_curve: Any, paths: np.ndarray, seed: np.ndarray = None,
+                                              method: np.ndarray = None):
         """
             Calculate the price of a commodity vanilla option calendar spread.
         :param evaluation_date: Date of evaluation
@@ -63,13 +147,16 @@ class QuantSpaceContext(object):
         :param volatility: Volatility term structure
         :param yield_curve: Yield term structure
         :param paths: Number of paths for Monte Carlo simulation
+        :param seed: Seed of the random number generator, fresh entropy if not given
+        :param method: 'KIRK' for Kirk's approximation or 'MC' for Monte Carlo simulation, 'KIRK' if not given
         :return: DataFrame with the price of vanilla calendar spread and helper values
         """
-        return qloptions.comdty_vanilla_option_calendar_spread(evaluation_date[0, 0], expiry_date_long[0, 0], expiry_date_short[0, 0], forward_price[0, 0], strike_price[0, 0], option_type[0, 0], correlation[0, 0], volatility, yield_curve, paths[0, 0])
+        return qloptions.comdty_vanilla_option_calendar_spread(_s(evaluation_date), _s(expiry_date_long), _s(expiry_date_short), _s(forward_price), _s(strike_price), _s(option_type), _s(correlation), registry.resolve(volatility), registry.resolve(yield_curve), _s(paths),
+                                                               None if seed is None else int(_s(seed)), 'KIRK' if method is None else _s(method))
 
     @staticmethod
     def comdty_vanilla_option_spread(evaluation_date: np.ndarray, expiry_date: np.ndarray, forward_price: np.ndarray, strike_price_long: np.ndarray, strike_price_short: np.ndarray, option_type: np.ndarray, exercise_type: np.ndarray,
-                                     volatility: Any, yield_curve: Any, steps: np.ndarray = np.array([[100]])):
+                                     volatility: Any, yield_curve: Any, steps: np.ndarray = None):
         """
             Calculate the price of a commodity vanilla option spread.
         :param evaluation_date: Date of evaluation
@@ -79,16 +166,16 @@ class QuantSpaceContext(object):
         :param strike_price_short: Strike price of the short option
         :param option_type: CALL or PUT
         :param exercise_type: EUROPEAN or AMERICAN
-        :param steps:  Number of steps for the binomial tree (only for American options)
+        :param steps:  Number of steps for the binomial tree (only for American options), 100 if not given
         :param volatility: Volatility term structure
         :param yield_curve: Yield term structure
         :return: DataFrame with option price, delta, gamma, theta, vega, rho for both options and the spread
         """
-        return qloptions.comdty_vanilla_option_spread(evaluation_date[0, 0], expiry_date[0, 0], forward_price[0, 0], strike_price_long[0, 0], strike_price_short[0, 0], option_type[0, 0], exercise_type[0, 0], steps[0, 0], volatility, yield_curve)
+        return qloptions.comdty_vanilla_option_spread(_s(evaluation_date), _s(expiry_date), _s(forward_price), _s(strike_price_long), _s(strike_price_short), _s(option_type), _s(exercise_type), _steps(steps), registry.resolve(volatility), registry.resolve(yield_curve))
 
     @staticmethod
     def comdty_vanilla_option_collar(evaluation_date: np.ndarray, expiry_date: np.ndarray, forward_price: np.ndarray, strike_price_call_short: np.ndarray, strike_price_put_long: np.ndarray, exercise_type: np.ndarray,
-                                     volatility: Any, yield_curve: Any, steps: np.ndarray = np.array([[100]])):
+                                     volatility: Any, yield_curve: Any, steps: np.ndarray = None):
         """
             Calculate the price of a commodity vanilla option collar.
         :param evaluation_date: Date of evaluation
@@ -97,16 +184,16 @@ class QuantSpaceContext(object):
         :param strike_price_call_short: Strike price of a short call option
         :param strike_price_put_long: Strike price of a long put option
         :param exercise_type: EUROPEAN or AMERICAN
-        :param steps: Number of steps for the binomial tree (only for American options)
+        :param steps: Number of steps for the binomial tree (only for American options), 100 if not given
         :param volatility: Volatility term structure
         :param yield_curve: Yield term structure
         :return: DataFrame with option price, delta, gamma, theta, vega, rho for both options and the collar
         """
-        return qloptions.comdty_vanilla_option_collar(evaluation_date[0, 0], expiry_date[0, 0], forward_price[0, 0], strike_price_call_short[0, 0], strike_price_put_long[0, 0],  exercise_type[0, 0], steps[0, 0], volatility, yield_curve)
+        return qloptions.comdty_vanilla_option_collar(_s(evaluation_date), _s(expiry_date), _s(forward_price), _s(strike_price_call_short), _s(strike_price_put_long),  _s(exercise_type), _steps(steps), registry.resolve(volatility), registry.resolve(yield_curve))
 
     @staticmethod
     def comdty_vanilla_option_butterfly(evaluation_date: np.ndarray, expiry_date: np.ndarray, forward_price: np.ndarray, strike_price_low_long: np.ndarray, strike_price_middle_short: np.ndarray, strike_price_high_long: np.ndarray, option_type: np.ndarray, exercise_type: np.ndarray,
-                                        volatility: Any, yield_curve: Any, steps: np.ndarray = np.array([[100]])):
+                                        volatility: Any, yield_curve: Any, steps: np.ndarray = None):
         """
             Calculate the price of a commodity vanilla option butterfly.
         :param evaluation_date: Date of evaluation
@@ -117,12 +204,12 @@ class QuantSpaceContext(object):
         :param strike_price_high_long: Strike price of the high long option
         :param option_type: CALL or PUT
         :param exercise_type: EUROPEAN or AMERICAN
-        :param steps: Number of steps for the binomial tree (only for American options)
+        :param steps: Number of steps for the binomial tree (only for American options), 100 if not given
         :param volatility: Volatility term structure
         :param yield_curve: Yield term structure
         :return: DataFrame with option price, delta, gamma, theta, vega, rho for all three options and the butterfly spread
         """
-        return qloptions.comdty_vanilla_option_butterfly(evaluation_date[0, 0], expiry_date[0, 0], forward_price[0, 0], strike_price_low_long[0, 0], strike_price_middle_short[0, 0], strike_price_high_long[0, 0], option_type[0, 0], exercise_type[0, 0], steps[0, 0], volatility, yield_curve)
+        return qloptions.comdty_vanilla_option_butterfly(_s(evaluation_date), _s(expiry_date), _s(forward_price), _s(strike_price_low_long), _s(strike_price_middle_short), _s(strike_price_high_long), _s(option_type), _s(exercise_type), _steps(steps), registry.resolve(volatility), registry.resolve(yield_curve))
 
     @staticmethod
     def black_constant_vol(evaluation_date: np.ndarray, volatility: np.ndarray, calendar: np.ndarray, day_counter: np.ndarray):
@@ -134,7 +221,7 @@ class QuantSpaceContext(object):
         :param day_counter: Day counter name
         :return: Black constant volatility object
         """
-        return qlvolsurface.black_constant_vol(evaluation_date[0, 0], calendar[0, 0], volatility[0, 0], day_counter[0, 0])
+        return qlvolsurface.black_constant_vol(_s(evaluation_date), _s(calendar), _s(volatility), _s(day_counter))
 
     @staticmethod
     def black_variance_surface(evaluation_date: np.ndarray, expirations: np.ndarray, strike_pries: np.ndarray, volatility_matrix: np.ndarray, day_counter: np.ndarray, calendar: np.ndarray,):
@@ -148,7 +235,7 @@ class QuantSpaceContext(object):
         :param day_counter: Day counter name
         :return: Black variance surface object
         """
-        return qlvolsurface.black_variance_surface(evaluation_date[0, 0], calendar[0, 0], expirations.flatten().tolist(), strike_pries.flatten().tolist(), volatility_matrix, day_counter[0, 0])
+        return qlvolsurface.black_variance_surface(_s(evaluation_date), _s(calendar), expirations.flatten().tolist(), strike_pries.flatten().tolist(), volatility_matrix, _s(day_counter))
 
     @staticmethod
     def volatility_from_surface(surface: np.ndarray, expiry_date: np.ndarray, strike_price: np.ndarray):
@@ -158,7 +245,18 @@ class QuantSpaceContext(object):
         :param expiry_date: Expiry date
         :param strike_price: Strike price
         :return: Volatility value"""
-        return qlvolsurface.volatility_from_surface(surface, expiry_date[0, 0], strike_price[0, 0])
+        return qlvolsurface.volatility_from_surface(registry.resolve(surface), _s(expiry_date), _s(strike_price))
+
+    @staticmethod
+    def volatility_from_surface_vec(surface: np.ndarray, expiry_dates: np.ndarray, strike_prices: np.ndarray):
+        """
+            Calculate the volatilities from a given surface for a grid of expiries and strikes.
+        :param surface: Volatility surface
+        :param expiry_dates: Expiry dates
+        :param strike_prices: Strike prices
+        :return: 2D array of volatilities with one row per expiry and one column per strike
+        """
+        return qlvolsurface.volatility_from_surface_vec(registry.resolve(surface), expiry_dates.flatten().tolist(), strike_prices.flatten().tolist())
 
     @staticmethod
     def zero_rates(yield_curve: np.ndarray, dates: np.ndarray, day_counter: np.ndarray, compounding: np.ndarray):
@@ -170,18 +268,30 @@ class QuantSpaceContext(object):
         :param compounding: Compounding frequency
         :return: Zero rates for the given dates
         """
-        return qlyield.zero_rates(yield_curve, dates.flatten(), day_counter[0, 0], compounding[0, 0])
+        return qlyield.zero_rates(registry.resolve(yield_curve), dates.flatten(), _s(day_counter), _s(compounding))
+
+    @staticmethod
+    def invalidate_zero_rates(yield_curve: Any = None):
+        """
+            Drop the cached zero rates of a yield curve, e.g. after its quotes were changed in place.
+        :param yield_curve: Yield curve object, all cached zero rates are dropped if not given
+        :return: Number of cached entries dropped
+        """
+        return qlyield.invalidate_zero_rates(None if yield_curve is None else registry.resolve(yield_curve))
 
     @staticmethod
     def year_fraction(day_counter: np.ndarray, start_date: np.ndarray, end_date: np.ndarray):
         """
             Calculate the year fraction between two dates using a given day counter.
         :param day_counter: Day counter name
-        :param start_date: Start date
-        :param end_date: End date
-        :return: Year fraction between the two dates
+        :param start_date: Start date, or range of start dates
+        :param end_date: End date, or range of end dates
+        :return: Year fraction between the two dates, or array of year fractions shaped like the broadcast date ranges
         """
-        return qlmisc.year_fraction(day_counter[0, 0], start_date[0, 0], end_date[0, 0])
+        if start_date.size > 1 or end_date.size > 1:
+            start_date, end_date = np.broadcast_arrays(start_date, end_date)
+            return qlmisc.year_fraction_vec(_s(day_counter), start_date.ravel(), end_date.ravel()).reshape(start_date.shape)
+        return qlmisc.year_fraction(_s(day_counter), _s(start_date), _s(end_date))
 
     @staticmethod
     def forward_curve(dates: np.ndarray, rates: np.ndarray, day_counter: np.ndarray, calendar: np.ndarray):
@@ -193,7 +303,7 @@ class QuantSpaceContext(object):
         :param calendar: Calendar name
         :return: Forward curve object
         """
-        return qlyield.forward_curve(dates.flatten(), rates.flatten(), day_counter[0, 0], calendar[0, 0])
+        return qlyield.forward_curve(dates.flatten(), rates.flatten(), _s(day_counter), _s(calendar))
 
     @staticmethod
     def schedule(start_date: np.ndarray, end_date: np.ndarray, tenor: np.ndarray, calendar: np.ndarray, bdc: np.ndarray, end_date_bdc: np.ndarray, date_generation_rule: np.ndarray, end_of_month: np.ndarray):
@@ -209,5 +319,5 @@ class QuantSpaceContext(object):
         :param end_of_month: End of month flag
         :return: Schedule object
         """
-        ql_schedule = qlmisc.schedule(start_date[0, 0], end_date[0, 0], tenor[0, 0], calendar[0, 0], bdc[0, 0], end_date_bdc[0, 0], date_generation_rule[0, 0], end_of_month[0, 0])
+        ql_schedule = qlmisc.schedule(_s(start_date), _s(end_date), _s(tenor), _s(calendar), _s(bdc), _s(end_date_bdc), _s(date_generation_rule), _s(end_of_month))
         return ql_schedule
@@ -0,0 +1,181 @@
+"""
+    Author: julij
+    Date: 15/10/2026
+    Description: Numba compiled Black-76 and binomial tree kernels
+"""
+
+import math
+import numpy as np
+from numba import njit, prange, guvectorize
+
+SQRT_2 = math.sqrt(2.0)
+INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+
+@njit(cache=True, fastmath=True)
+def _norm_cdf(x):
+    """
+        Standard normal cumulative distribution function
+    :param x: Point at which to evaluate the distribution
+    :return: Probability that a standard normal variable is below x
+    """
+    return 0.5 * math.erfc(-x / SQRT_2)
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _bs76_greeks_njit(F, K, T, df, tau, sigma, cp):
+    """
+        Black-76 price and greeks of a European option on a forward, with QuantLib's AnalyticEuropeanEngine conventions:
+        the variance runs on the volatility day counter and rho on the yield curve day counter
+    :param F: Forward price of the underlying asset
+    :param K: Strike price of the option
+    :param T: Year fraction to expiry on the volatility day counter
+    :param df: Discount factor to expiry
+    :param tau: Year fraction to expiry on the yield curve day counter
+    :param sigma: Black volatility
+    :param cp: 1.0 for CALL, -1.0 for PUT
+    :return: Tuple with option price, delta, gamma, theta, vega, rho
+    """
+    # an option at or past expiry is worth nothing further, as QuantLib reports for an expired instrument
+    if T <= 0.0:
+        return 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
+    sqrt_t = math.sqrt(T)
+    std_dev = sigma * sqrt_t
+    d1 = (math.log(F / K) + 0.5 * std_dev * std_dev) / std_dev
+    d2 = d1 - std_dev
+    n_d1 = _norm_cdf(cp * d1)
+    n_d2 = _norm_cdf(cp * d2)
+    pdf_d1 = math.exp(-0.5 * d1 * d1) * INV_SQRT_2PI
+
+    price = df * cp * (F * n_d1 - K * n_d2)
+    delta = df * cp * n_d1
+    gamma = df * pdf_d1 / (F * std_dev)
+    theta = -math.log(df) / T * price - 0.5 * sigma * sigma * F * F * gamma
+    vega = df * F * pdf_d1 * sqrt_t
+    rho = cp * tau * df * K * n_d2
+    return price, delta, gamma, theta, vega, rho
+
+
+@guvectorize(['void(f8, f8, f8, f8, f8, f8, f8, f8[:], f8[:], f8[:], f8[:], f8[:], f8[:])'], '(),(),(),(),(),(),()->(),(),(),(),(),()', nopython=True, cache=True)
+def _bs76_greeks_gufunc(F, K, T, df, tau, sigma, cp, price, delta, gamma, theta, vega, rho):
+    """
+        Black-76 price and greeks as a broadcasting ufunc, so several strikes or expiries are priced in one compiled loop
+    :param F: Forward prices
+    :param K: Strike prices
+    :param T: Year fractions to expiry on the volatility day counter
+    :param df: Discount factors to expiry
+    :param tau: Year fractions to expiry on the yield curve day counter
+    :param sigma: Black volatilities
+    :param cp: 1.0 for CALL, -1.0 for PUT
+    :return: Tuple of arrays with option price, delta, gamma, theta, vega, rho
+    """
+    price[0], delta[0], gamma[0], theta[0], vega[0], rho[0] = _bs76_greeks_njit(F, K, T, df, tau, sigma, cp)
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _crr_rollback_njit(spots, K, pu, disc, N, cp):
+    """
+        Backward induction of several American Cox-Ross-Rubinstein trees in one pass, in place over one value array per tree.
+        Node j at step i of tree k sits at spots[k, 2j - i + N].
+    :param spots: Array of shape (m, 2N + 1) with the node prices of each tree
+    :param K: Strike price of the option
+    :param pu: Array of up probabilities per tree
+    :param disc: Array of one step discount factors per tree
+    :param N: Number of time steps, at least 2
+    :param cp: 1.0 for CALL, -1.0 for PUT
+    :return: Array of shape (m, 6) with the price and the step 1 (down, up) and step 2 (down, middle, up) values of each tree
+    """
+    trees = spots.shape[0]
+    values = np.empty((trees, N + 1))
+    nodes = np.empty((trees, 6))
+    for k in range(trees):
+        for j in range(N + 1):
+            values[k, j] = max(cp * (spots[k, 2 * j] - K), 0.0)
+        if N == 2:
+            nodes[k, 3], nodes[k, 4], nodes[k, 5] = values[k, 0], values[k, 1], values[k, 2]
+
+    for i in range(N - 1, -1, -1):
+        for k in range(trees):
+            up, down, discount = pu[k], 1.0 - pu[k], disc[k]
+            for j in range(i + 1):
+                continuation = discount * (down * values[k, j] + up * values[k, j + 1])
+                values[k, j] = max(continuation, cp * (spots[k, 2 * j - i + N] - K))
+            if i == 2:
+                nodes[k, 3], nodes[k, 4], nodes[k, 5] = values[k, 0], values[k, 1], values[k, 2]
+            elif i == 1:
+                nodes[k, 1], nodes[k, 2] = values[k, 0], values[k, 1]
+    nodes[:, 0] = values[:, 0]
+    return nodes
+
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _crr_american_njit(F, K, r, sigma, T, N, cp, vega_bump, rho_bump):
+    """
+        American option on a forward priced on Cox-Ross-Rubinstein trees, with the same log-space parametrisation and
+        finite difference greeks as QuantLib's BinomialCRRVanillaEngine. The forward drifts at dividend yield equal to r,
+        so the base and rate bumped trees share one lattice and are rolled back together; the two vol bumped trees,
+        with their own lattices, go through a second fused pass.
+    :param F: Forward price of the underlying asset
+    :param K: Strike price of the option
+    :param r: Continuously compounded risk-free rate
+    :param sigma: Volatility
+    :param T: Year fraction to expiry
+    :param N: Number of time steps, at least 2
+    :param cp: 1.0 for CALL, -1.0 for PUT
+    :param vega_bump: Volatility bump of the central difference vega, one sided when sigma is not above it
+    :param rho_bump: Rate bump of the central difference rho
+    :return: Tuple with option price, delta, gamma, theta, vega, rho
+    """
+    if N < 2:
+        raise ValueError('At least 2 binomial steps are required')
+    if T <= 0.0:
+        return 0.0, 0.0, 0.0, 0.0, 0.0, 0.0
+    dt = T / N
+    offsets = np.arange(2 * N + 1) - N
+
+    dx = sigma * math.sqrt(dt)
+    spots = np.empty((3, 2 * N + 1))
+    spots[:] = F * np.exp(offsets * dx)
+    pu = np.full(3, 0.5 - 0.25 * sigma * sigma * dt / dx)
+    rates = np.array([r, r + rho_bump, r - rho_bump])
+    base = _crr_rollback_njit(spots, K, pu, np.exp(-rates * dt), N, cp)
+
+    sigmas = np.array([sigma + vega_bump, sigma - vega_bump if sigma > vega_bump else sigma])
+    dxs = sigmas * math.sqrt(dt)
+    bumped_spots = np.empty((2, 2 * N + 1))
+    for k in range(2):
+        bumped_spots[k] = F * np.exp(offsets * dxs[k])
+    bumped = _crr_rollback_njit(bumped_spots, K, 0.5 - 0.25 * sigmas * sigmas * dt / dxs, np.full(2, math.exp(-r * dt)), N, cp)
+
+    price = base[0, 0]
+    delta = (base[0, 2] - base[0, 1]) / (spots[0, N + 1] - spots[0, N - 1])
+    gamma = ((base[0, 5] - base[0, 4]) / (spots[0, N + 2] - spots[0, N]) - (base[0, 4] - base[0, 3]) / (spots[0, N] - spots[0, N - 2])) / (0.5 * (spots[0, N + 2] - spots[0, N - 2]))
+    theta = r * price - 0.5 * sigma * sigma * F * F * gamma
+    vega = (bumped[0, 0] - bumped[1, 0]) / (sigmas[0] - sigmas[1])
+    rho = (base[1, 0] - base[2, 0]) / (2.0 * rho_bump)
+    return price, delta, gamma, theta, vega, rho
+
+
+@njit(parallel=True, cache=True, fastmath=True)
+def _crr_american_batch_njit(F, K, r, sigma, T, N, cp, vega_bump, rho_bump, out):
+    """
+        Binomial price and greeks of a batch of American options on forwards, one option per parallel iteration
+    :param F: Array of forward prices
+    :param K: Array of strike prices
+    :param r: Array of continuously compounded risk-free rates to expiry
+    :param sigma: Array of volatilities
+    :param T: Array of year fractions to expiry
+    :param N: Array of numbers of time steps
+    :param cp: Array of 1.0 for CALL, -1.0 for PUT
+    :param vega_bump: Volatility bump of the central difference vega
+    :param rho_bump: Rate bump of the central difference rho
+    :param out: Output array of shape (n, 6) receiving price, delta, gamma, theta, vega, rho
+    """
+    for i in prange(F.shape[0]):
+        price, delta, gamma, theta, vega, rho = _crr_american_njit(F[i], K[i], r[i], sigma[i], T[i], N[i], cp[i], vega_bump, rho_bump)
+        out[i, 0] = price
+        out[i, 1] = delta
+        out[i, 2] = gamma
+        out[i, 3] = theta
+        out[i, 4] = vega
+        out[i, 5] = rho
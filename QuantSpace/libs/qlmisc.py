@@ -6,9 +6,13 @@
 
 import numpy as np
 import QuantLib as ql
+from typing import List
 from datetime import datetime
 import QuantSpace.libs.qlutils as qlu
 
+# QuantLib date serial numbers count days from the same epoch as Excel
+SERIAL_NUMBER_BASE = np.datetime64('1899-12-30', 'D')
+
 
 def year_fraction(day_counter: ql.DayCounter, start_date: datetime, end_date: datetime):
     """
@@ -24,6 +28,21 @@ def year_fraction(day_counter: ql.DayCounter, start_date: datetime, end_date: da
     return day_counter.yearFraction(start_date, end_date)
 
 
+def year_fraction_vec(day_counter: str, start_dates: List[datetime], end_dates: List[datetime]):
+    """
+        Calculate the year fractions between pairs of dates using a specified day counter.
+    :param day_counter: day counter type (e.g. 'ACT/360', '30/360', etc.)
+    :param start_dates: start dates
+    :param end_dates: end dates, one per start date
+    :return: array of year fractions
+    """
+    day_counter = qlu.ql_day_counter(day_counter)
+    year_fractions = np.empty(len(start_dates))
+    for i in range(len(start_dates)):
+        year_fractions[i] = day_counter.yearFraction(qlu.py_to_ql_date(start_dates[i]), qlu.py_to_ql_date(end_dates[i]))
+    return year_fractions
+
+
 def schedule(start_date: datetime, end_date: datetime, tenor: str, calendar: str, bdc: str, end_date_bdc: str, date_generation_rule: str, end_of_month: bool):
     """
         Create a schedule of dates between two dates with specified tenor, calendar, business day convention, and date generation rule.
@@ -35,7 +54,7 @@ def schedule(start_date: datetime, end_date: datetime, tenor: str, calendar: str
     :param end_date_bdc: end date business day convention (e.g. 'Following', 'Preceding', etc.)
     :param date_generation_rule: date generation rule (e.g. 'Backward', 'Forward', 'Zero', etc.)
     :param end_of_month: end of month flag (True or False)
-    :return: schedule of dates
+    :return: schedule of dates as a column of numpy datetime64 values
     """
     start_date = qlu.py_to_ql_date(start_date)
     end_date = qlu.py_to_ql_date(end_date)
@@ -45,7 +64,8 @@ def schedule(start_date: datetime, end_date: datetime, tenor: str, calendar: str
     end_date_bdc = qlu.ql_weekday_correction(end_date_bdc)
     date_generation_rule = qlu.ql_date_generation(date_generation_rule)
     ql_schedule = ql.Schedule(start_date, end_date, tenor, calendar, bdc, end_date_bdc, date_generation_rule, end_of_month)
-    return np.array([datetime(x.year(), x.month(), x.dayOfMonth()) for x in ql_schedule]).reshape(-1, 1)
+    serial_numbers = np.fromiter((x.serialNumber() for x in ql_schedule), dtype=np.int64, count=len(ql_schedule))
+    return (SERIAL_NUMBER_BASE + serial_numbers.astype('timedelta64[D]')).reshape(-1, 1)
 
 
 
@@ -4,16 +4,39 @@
     Description: Vanilla commodity option pricing using QuantLib
 """
 
+import os
 import numpy as np
 import pandas as pd
 import QuantLib as ql
-from typing import Any
-from scipy.stats import norm
+from typing import Any, List, NamedTuple
+from scipy.special import ndtr, ndtri
 from datetime import datetime
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import QuantSpace.libs.qlutils as qlu
+from QuantSpace.libs._bs_kernels import INV_SQRT_2PI, _bs76_greeks_njit, _bs76_greeks_gufunc, _crr_american_njit, _crr_american_batch_njit
 
+_POOL = ThreadPoolExecutor(max_workers=os.cpu_count())
 
-def comdty_vanilla_option(evaluation_date: datetime, expiry_date: datetime, forward_price: float, strike_price: float, option_type: str, exercise_type: str, steps: int, volatility: Any, yield_curve: Any):
+VEGA_BUMP = 0.01
+RHO_BUMP = 0.001
+# independently scrambled Sobol sets per simulation, whose spread gives the standard error
+QMC_REPLICATES = 8
+
+# struct-of-arrays layout of a batch of European options, one contiguous float64 array per field
+OptionBatch = namedtuple('OptionBatch', 'F K T df tau sigma cp')
+
+GreeksResult = NamedTuple('GreeksResult', [('price', float), ('delta', float), ('gamma', float), ('theta', float), ('vega', float), ('rho', float)])
+
+# row labels shared by every result frame, built once rather than per call
+GREEKS_INDEX = pd.Index(GreeksResult._fields)
+DELTA_STRIKE_INDEX = GREEKS_INDEX.append(pd.Index(['d1', 'riskfree_rate', 'volatility_atm', 'years_to_maturity', 'strike_price']))
+CALENDAR_SPREAD_INDEX = pd.Index(['price', 'payoff', 'risk_free_rate_long', 'risk_free_rate_short', 'volatility_long', 'volatility_short', 'standard_error',
+                                  'delta_long', 'delta_short', 'vega_long', 'vega_short'])
+
+
+def comdty_vanilla_option(evaluation_date: datetime, expiry_date: datetime, forward_price: float, strike_price: float, option_type: str, exercise_type: str, steps: int, volatility: Any, yield_curve: Any,
+                          use_quantlib: bool = False):
     """
          Vanilla commodity option pricing using QuantLib
     :param evaluation_date:  Date of evaluation
@@ -25,34 +48,274 @@ def comdty_vanilla_option(evaluation_date: datetime, expiry_date: datetime, forw
     :param steps: Number of steps for the binomial tree (only for American options)
     :param volatility: Volatility term structure
     :param yield_curve: Yield term structure
+    :param use_quantlib: Price American options with QuantLib's binomial engine instead of the compiled tree
     :return: DataFrame with option price, delta, gamma, theta, vega, rho
     """
+    greeks = comdty_vanilla_option_greeks(evaluation_date, expiry_date, forward_price, strike_price, option_type, exercise_type, steps, volatility, yield_curve, use_quantlib)
+    return pd.DataFrame(list(greeks), columns=[option_type], index=GREEKS_INDEX)
+
+
+def comdty_vanilla_option_greeks(evaluation_date: datetime, expiry_date: datetime, forward_price: float, strike_price: float, option_type: str, exercise_type: str, steps: int, volatility: Any,
+                                 yield_curve: Any, use_quantlib: bool = False):
+    """
+         Vanilla commodity option price and greeks as plain floats, without building a DataFrame
+    :param evaluation_date:  Date of evaluation
+    :param expiry_date: Date of expiry
+    :param forward_price: Forward price of the underlying asset
+    :param strike_price: Strike price of the option
+    :param option_type: 'CALL' or 'PUT'
+    :param exercise_type: 'EUROPEAN' or 'AMERICAN'
+    :param steps: Number of steps for the binomial tree (only for American options)
+    :param volatility: Volatility term structure
+    :param yield_curve: Yield term structure
+    :param use_quantlib: Price American options with QuantLib's binomial engine instead of the compiled tree
+    :return: GreeksResult with option price, delta, gamma, theta, vega, rho
+    """
     ql.Settings.instance().evaluationDate = qlu.py_to_ql_date(evaluation_date)
     expiry_date = qlu.py_to_ql_date(expiry_date)
-    volatility = ql.BlackVolTermStructureHandle(volatility)
-    yield_curve = ql.YieldTermStructureHandle(yield_curve)
+
+    if exercise_type.upper() != 'AMERICAN':
+        years_to_maturity = volatility.timeFromReference(expiry_date)
+        if years_to_maturity <= 0.0:
+            return GreeksResult(0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        # discounting and rho run on the curve's own day counter, as in QuantLib's analytic engine
+        discount_factor, rate_time = yield_curve.discount(expiry_date), yield_curve.timeFromReference(expiry_date)
+        cp = 1.0 if option_type.upper() == 'CALL' else -1.0
+        return GreeksResult(*_bs76_greeks_njit(float(forward_price), float(strike_price), years_to_maturity, discount_factor, rate_time, volatility.blackVol(expiry_date, strike_price), cp))
+
+    # the binomial engine flattens vol (at the forward) and rate at expiry, so quoting them directly leaves the price unchanged
+    # and lets the greeks be bumped through the quotes without rebuilding the process or engine
+    if int(steps) < 2:
+        raise ValueError('At least 2 binomial steps are required')
+    years_to_maturity = yield_curve.dayCounter().yearFraction(yield_curve.referenceDate(), expiry_date)
+    if years_to_maturity <= 0.0:
+        return GreeksResult(0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    volatility_flat = volatility.blackVol(expiry_date, forward_price)
+    riskfree_rate = yield_curve.zeroRate(expiry_date, yield_curve.dayCounter(), ql.Continuous).rate()
+
+    if not use_quantlib:
+        F, K, N = float(forward_price), float(strike_price), int(steps)
+        cp = 1.0 if option_type.upper() == 'CALL' else -1.0
+        return GreeksResult(*_crr_american_njit(F, K, riskfree_rate, volatility_flat, years_to_maturity, N, cp, VEGA_BUMP, RHO_BUMP))
+
+    volatility_quote = ql.SimpleQuote(volatility_flat)
+    riskfree_rate_quote = ql.SimpleQuote(riskfree_rate)
+    volatility_term_structure = ql.BlackVolTermStructureHandle(ql.BlackConstantVol(volatility.referenceDate(), volatility.calendar(), ql.QuoteHandle(volatility_quote), volatility.dayCounter()))
+    riskfree_rate_term_structure = ql.YieldTermStructureHandle(ql.FlatForward(yield_curve.referenceDate(), ql.QuoteHandle(riskfree_rate_quote), yield_curve.dayCounter()))
     option_type_ql = ql.Option.Call if option_type.upper() == 'CALL' else ql.Option.Put
 
-    process = ql.BlackProcess(ql.QuoteHandle(ql.SimpleQuote(forward_price)), yield_curve, volatility)
+    process = ql.BlackProcess(ql.QuoteHandle(ql.SimpleQuote(forward_price)), riskfree_rate_term_structure, volatility_term_structure)
     payoff = ql.PlainVanillaPayoff(option_type_ql, strike_price)
 
-    if exercise_type.upper() == 'AMERICAN':
-        exercise = ql.AmericanExercise(qlu.py_to_ql_date(evaluation_date), expiry_date)
-        engine = ql.BinomialCRRVanillaEngine(process, int(steps))
-        option = ql.VanillaOption(payoff, exercise)
-        option.setPricingEngine(engine)
-        option_vega = estimate_vega(option, process, volatility, strike_price, expiry_date, steps)
-        option_rho = estimate_rho(option, process, yield_curve, volatility, expiry_date, steps)
-    else:
-        engine = ql.AnalyticEuropeanEngine(process)
-        option = ql.EuropeanOption(payoff, ql.EuropeanExercise(expiry_date))
-        option.setPricingEngine(engine)
-        option_vega = option.vega()
-        option_rho = option.rho()
-
-    result_frame = pd.DataFrame([option.NPV(), option.delta(), option.gamma(), option.theta(), option_vega, option_rho],
-                                columns=[option_type], index=['price', 'delta', 'gamma', 'theta', 'vega', 'rho'])
-    return result_frame
+    exercise = ql.AmericanExercise(qlu.py_to_ql_date(evaluation_date), expiry_date)
+    engine = ql.BinomialCRRVanillaEngine(process, int(steps))
+    option = ql.VanillaOption(payoff, exercise)
+    option.setPricingEngine(engine)
+    option_npv, option_delta, option_gamma, option_theta = option.NPV(), option.delta(), option.gamma(), option.theta()
+    option_vega = estimate_vega(option, volatility_quote)
+    option_rho = estimate_rho(option, riskfree_rate_quote)
+    return GreeksResult(option_npv, option_delta, option_gamma, option_theta, option_vega, option_rho)
+
+
+def comdty_vanilla_option_vec(F: np.ndarray, K: np.ndarray, tau: np.ndarray, sigma: np.ndarray, df: np.ndarray, cp: np.ndarray, rate_tau: np.ndarray = None):
+    """
+        Vectorised Black-76 pricing of European commodity options
+    :param F: Forward price of the underlying asset
+    :param K: Strike price of the option
+    :param tau: Year fraction to expiry on the volatility day counter
+    :param sigma: Black volatility
+    :param df: Discount factor to expiry
+    :param cp: 1.0 for CALL, -1.0 for PUT
+    :param rate_tau: Year fraction to expiry on the yield curve day counter, used for rho, tau if None
+    :return: Dictionary of arrays with option price, delta, gamma, theta, vega, rho
+    """
+    rate_tau = tau if rate_tau is None else rate_tau
+    F, K, tau, sigma, df, cp, rate_tau = np.broadcast_arrays(*[np.asarray(x, dtype=np.float64) for x in (F, K, tau, sigma, df, cp, rate_tau)])
+    sqrt_tau = np.sqrt(tau)
+    std_dev = sigma * sqrt_tau
+    d1 = (np.log(F / K) + 0.5 * std_dev * std_dev) / std_dev
+    d2 = d1 - std_dev
+    n_d1 = ndtr(cp * d1)
+    n_d2 = ndtr(cp * d2)
+    pdf_d1 = np.exp(-0.5 * d1 * d1) * INV_SQRT_2PI
+
+    price = df * cp * (F * n_d1 - K * n_d2)
+    delta = df * cp * n_d1
+    gamma = df * pdf_d1 / (F * std_dev)
+    vega = df * F * pdf_d1 * sqrt_tau
+    theta = -np.log(df) / tau * price - 0.5 * sigma * sigma * F * F * gamma
+    rho = cp * rate_tau * df * K * n_d2
+    return {'price': price, 'delta': delta, 'gamma': gamma, 'theta': theta, 'vega': vega, 'rho': rho}
+
+
+def option_batch(F: np.ndarray, K: np.ndarray, T: np.ndarray, df: np.ndarray, tau: np.ndarray, sigma: np.ndarray, cp: np.ndarray):
+    """
+        Build an OptionBatch, broadcasting the inputs and laying each field out as a contiguous float64 array
+    :param F: Forward prices of the underlying assets
+    :param K: Strike prices
+    :param T: Year fractions to expiry on the volatility day counter
+    :param df: Discount factors to expiry
+    :param tau: Year fractions to expiry on the yield curve day counter
+    :param sigma: Black volatilities
+    :param cp: 1.0 for CALL, -1.0 for PUT
+    :return: OptionBatch
+    """
+    return OptionBatch(*[np.ascontiguousarray(np.ravel(x), dtype=np.float64) for x in np.broadcast_arrays(F, K, T, df, tau, sigma, cp)])
+
+
+def black76_batch(batch: OptionBatch):
+    """
+        Vectorised Black-76 pricing of a batch of European options
+    :param batch: OptionBatch with the options to price
+    :return: Dictionary of arrays with option price, delta, gamma, theta, vega, rho, zero for options at or past expiry
+    """
+    live = batch.T > 0.0
+    if live.all():
+        return comdty_vanilla_option_vec(batch.F, batch.K, batch.T, batch.sigma, batch.df, batch.cp, batch.tau)
+
+    result = {name: np.zeros(batch.T.size) for name in GreeksResult._fields}
+    if live.any():
+        F, K, T, df, tau, sigma, cp = [field[live] for field in batch]
+        for name, values in comdty_vanilla_option_vec(F, K, T, sigma, df, cp, tau).items():
+            result[name][live] = values
+    return result
+
+
+def comdty_vanilla_option_chain(evaluation_date: datetime, expiry_dates: np.ndarray, forward_price: float, strike_prices: np.ndarray, option_type: str, volatility: Any, yield_curve: Any):
+    """
+        European commodity option pricing for a chain of strikes and expiries using vectorised Black-76
+    :param evaluation_date: Date of evaluation
+    :param expiry_dates: Array of expiry dates
+    :param forward_price: Forward price of the underlying asset
+    :param strike_prices: Array of strike prices, broadcast against expiry_dates
+    :param option_type: 'CALL' or 'PUT'
+    :param volatility: Volatility term structure
+    :param yield_curve: Yield term structure
+    :return: Dictionary of arrays with option price, delta, gamma, theta, vega, rho shaped like the broadcast strikes
+    """
+    ql.Settings.instance().evaluationDate = qlu.py_to_ql_date(evaluation_date)
+    expiry_dates, strike_prices = np.broadcast_arrays(np.asarray(expiry_dates, dtype=object), np.asarray(strike_prices, dtype=np.float64))
+    expiry_dates_ql = [qlu.py_to_ql_date(date) for date in expiry_dates.flat]
+
+    years_to_maturity = np.array([volatility.timeFromReference(date) for date in expiry_dates_ql])
+    # expired options are priced at zero by black76_batch, so their market data is never read
+    live = years_to_maturity > 0.0
+    discount_factors = np.array([yield_curve.discount(date) if alive else 1.0 for date, alive in zip(expiry_dates_ql, live)])
+    rate_times = np.array([yield_curve.timeFromReference(date) if alive else 0.0 for date, alive in zip(expiry_dates_ql, live)])
+    sigma = np.array([volatility.blackVol(date, strike) if alive else 0.0 for date, strike, alive in zip(expiry_dates_ql, strike_prices.flat, live)])
+    cp = 1.0 if option_type.upper() == 'CALL' else -1.0
+
+    result = black76_batch(option_batch(forward_price, strike_prices.ravel(), years_to_maturity, discount_factors, rate_times, sigma, cp))
+    return {name: values.reshape(strike_prices.shape) for name, values in result.items()}
+
+
+def _european_legs(evaluation_date: datetime, expiry_date: datetime, forward_price: float, strike_prices: List[float], cp: List[float], volatility: Any, yield_curve: Any):
+    """
+        Black-76 price and greeks of the European legs of an option structure, priced in one compiled ufunc call
+    :param evaluation_date: Date of evaluation
+    :param expiry_date: Date of expiry shared by all legs
+    :param forward_price: Forward price of the underlying asset
+    :param strike_prices: Strike price of each leg
+    :param cp: 1.0 for CALL, -1.0 for PUT of each leg
+    :param volatility: Volatility term structure
+    :param yield_curve: Yield term structure
+    :return: Array of shape (6, legs) with price, delta, gamma, theta, vega, rho of each leg
+    """
+    ql.Settings.instance().evaluationDate = qlu.py_to_ql_date(evaluation_date)
+    expiry_date = qlu.py_to_ql_date(expiry_date)
+    years_to_maturity = volatility.timeFromReference(expiry_date)
+    if years_to_maturity <= 0.0:
+        return np.zeros((6, len(strike_prices)))
+    sigma = np.array([volatility.blackVol(expiry_date, strike) for strike in strike_prices])
+    discount_factor, rate_time = yield_curve.discount(expiry_date), yield_curve.timeFromReference(expiry_date)
+    return np.array(_bs76_greeks_gufunc(forward_price, np.asarray(strike_prices, dtype=np.float64), years_to_maturity, discount_factor, rate_time, sigma, np.asarray(cp, dtype=np.float64)))
+
+
+def _american_legs(evaluation_date: datetime, expiry_date: datetime, forward_price: float, strike_prices: List[float], cp: List[float], steps: int, volatility: Any, yield_curve: Any):
+    """
+        Binomial price and greeks of the American legs of an option structure, one leg per pool thread.
+        Market data is read from QuantLib up front, so the threads only run the compiled tree, which releases the GIL.
+    :param evaluation_date: Date of evaluation
+    :param expiry_date: Date of expiry shared by all legs
+    :param forward_price: Forward price of the underlying asset
+    :param strike_prices: Strike price of each leg
+    :param cp: 1.0 for CALL, -1.0 for PUT of each leg
+    :param steps: Number of steps for the binomial tree
+    :param volatility: Volatility term structure
+    :param yield_curve: Yield term structure
+    :return: Array of shape (6, legs) with price, delta, gamma, theta, vega, rho of each leg
+    """
+    if int(steps) < 2:
+        raise ValueError('At least 2 binomial steps are required')
+    ql.Settings.instance().evaluationDate = qlu.py_to_ql_date(evaluation_date)
+    expiry_date = qlu.py_to_ql_date(expiry_date)
+    years_to_maturity = yield_curve.dayCounter().yearFraction(yield_curve.referenceDate(), expiry_date)
+    if years_to_maturity <= 0.0:
+        return np.zeros((6, len(strike_prices)))
+    volatility_flat = volatility.blackVol(expiry_date, forward_price)
+    riskfree_rate = yield_curve.zeroRate(expiry_date, yield_curve.dayCounter(), ql.Continuous).rate()
+
+    tasks = [_POOL.submit(_crr_american_njit, float(forward_price), float(strike), riskfree_rate, volatility_flat, years_to_maturity, int(steps), leg_cp, VEGA_BUMP, RHO_BUMP)
+             for strike, leg_cp in zip(strike_prices, cp)]
+    return np.array([task.result() for task in tasks]).T
+
+
+def comdty_vanilla_option_batch(evaluation_date: datetime, expiry_dates: np.ndarray, forward_prices: np.ndarray, strike_prices: np.ndarray, option_types: np.ndarray, exercise_types: np.ndarray, steps: np.ndarray,
+                                volatility: Any, yield_curve: Any, contract_ids: np.ndarray = None):
+    """
+        Vanilla commodity option pricing for a portfolio of options. Market data is read from QuantLib once per option,
+        European options are then priced in one vectorised Black-76 pass and American options by the compiled binomial
+        tree in parallel over the batch.
+    :param evaluation_date: Date of evaluation
+    :param expiry_dates: Array of expiry dates
+    :param forward_prices: Array of forward prices of the underlying assets
+    :param strike_prices: Array of strike prices
+    :param option_types: Array of 'CALL' or 'PUT'
+    :param exercise_types: Array of 'EUROPEAN' or 'AMERICAN'
+    :param steps: Array of numbers of steps for the binomial tree (only for American options)
+    :param volatility: Volatility term structure
+    :param yield_curve: Yield term structure
+    :param contract_ids: Array of contract identifiers used as index, row numbers if None
+    :return: DataFrame with one row per contract and columns price, delta, gamma, theta, vega, rho
+    """
+    ql.Settings.instance().evaluationDate = qlu.py_to_ql_date(evaluation_date)
+    expiry_dates, forward_prices, strike_prices, option_types, exercise_types, steps = [np.ravel(x) for x in np.broadcast_arrays(expiry_dates, forward_prices, strike_prices, option_types, exercise_types, steps)]
+    forward_prices = forward_prices.astype(np.float64)
+    strike_prices = strike_prices.astype(np.float64)
+    expiry_dates_ql = [qlu.py_to_ql_date(date) for date in expiry_dates]
+    american = np.char.upper(exercise_types.astype(str)) == 'AMERICAN'
+    cp = np.where(np.char.upper(option_types.astype(str)) == 'CALL', 1.0, -1.0)
+    result = np.empty((expiry_dates.size, 6))
+
+    european_rows = np.flatnonzero(~american)
+    if european_rows.size:
+        years_to_maturity = np.array([volatility.timeFromReference(expiry_dates_ql[i]) for i in european_rows])
+        live = years_to_maturity > 0.0
+        discount_factors = np.array([yield_curve.discount(expiry_dates_ql[i]) if alive else 1.0 for i, alive in zip(european_rows, live)])
+        rate_times = np.array([yield_curve.timeFromReference(expiry_dates_ql[i]) if alive else 0.0 for i, alive in zip(european_rows, live)])
+        sigma = np.array([volatility.blackVol(expiry_dates_ql[i], strike_prices[i]) if alive else 0.0 for i, alive in zip(european_rows, live)])
+        greeks = black76_batch(option_batch(forward_prices[european_rows], strike_prices[european_rows], years_to_maturity, discount_factors, rate_times, sigma, cp[european_rows]))
+        result[european_rows] = np.column_stack(list(greeks.values()))
+
+    american_rows = np.flatnonzero(american)
+    if american_rows.size:
+        american_steps = steps[american_rows].astype(np.int64)
+        if (american_steps < 2).any():
+            raise ValueError('At least 2 binomial steps are required')
+        # the binomial tree only uses the vol at the forward and the zero rate at expiry
+        day_counter, reference_date = yield_curve.dayCounter(), yield_curve.referenceDate()
+        years_to_maturity = np.array([day_counter.yearFraction(reference_date, expiry_dates_ql[i]) for i in american_rows])
+        # the tree prices expired options at zero without reading their market data
+        live = years_to_maturity > 0.0
+        riskfree_rate = np.array([yield_curve.zeroRate(expiry_dates_ql[i], day_counter, ql.Continuous).rate() if alive else 0.0 for i, alive in zip(american_rows, live)])
+        sigma = np.array([volatility.blackVol(expiry_dates_ql[i], forward_prices[i]) if alive else 0.0 for i, alive in zip(american_rows, live)])
+        out = np.empty((american_rows.size, 6))
+        _crr_american_batch_njit(forward_prices[american_rows], strike_prices[american_rows], riskfree_rate, sigma, years_to_maturity, american_steps,
+                                 cp[american_rows], VEGA_BUMP, RHO_BUMP, out)
+        result[american_rows] = out
+
+    index = np.arange(expiry_dates.size) if contract_ids is None else np.ravel(contract_ids)
+    return pd.DataFrame(result, index=index, columns=GREEKS_INDEX)
 
 
 def comdty_vanilla_option_delta(evaluation_date: datetime, expiry_date: datetime, forward_price: float, delta: float, option_type: str, volatility: Any, yield_curve: Any):
@@ -78,19 +341,14 @@ def comdty_vanilla_option_delta(evaluation_date: datetime, expiry_date: datetime
     volatility_atm = volatility.blackVol(years_to_maturity, forward_price)
 
     if option_type.upper() == 'CALL':
-        d1 = norm.ppf(delta * np.exp(riskfree_rate * years_to_maturity))
+        d1 = ndtri(delta * np.exp(riskfree_rate * years_to_maturity))
     else:
-        d1 = norm.ppf(delta * np.exp(riskfree_rate * years_to_maturity) + 1)
+        d1 = ndtri(delta * np.exp(riskfree_rate * years_to_maturity) + 1)
 
     strike_price = forward_price / np.exp(volatility_atm * np.sqrt(years_to_maturity) * d1 - (0.5 * (volatility_atm ** 2)) * years_to_maturity)
 
-    option_frame = comdty_vanilla_option(evaluation_date, expiry_date, forward_price, strike_price, option_type, 'EUROPEAN', None, volatility, yield_curve)
-
-    strike_frame = pd.DataFrame([d1, riskfree_rate, volatility_atm, years_to_maturity, strike_price],
-                                columns=[option_type], index=['d1', 'riskfree_rate', 'volatility_atm', 'years_to_maturity', 'strike_price'])
-
-    result_frame = pd.concat([option_frame, strike_frame], axis=0)
-    return result_frame
+    greeks = comdty_vanilla_option_greeks(evaluation_date, expiry_date, forward_price, strike_price, option_type, 'EUROPEAN', None, volatility, yield_curve)
+    return pd.DataFrame([*greeks, d1, riskfree_rate, volatility_atm, years_to_maturity, strike_price], columns=[option_type], index=DELTA_STRIKE_INDEX)
 
 
 def comdty_vanilla_option_spread(evaluation_date: datetime, expiry_date: datetime, forward_price: float, strike_price_long: float, strike_price_short: float, option_type: str, exercise_type: str, steps: int,
@@ -109,13 +367,13 @@ def comdty_vanilla_option_spread(evaluation_date: datetime, expiry_date: datetim
     :param yield_curve: Yield term structure
     :return: DataFrame with option price, delta, gamma, theta, vega, rho for both options and the spread
     """
-    option_price_long = comdty_vanilla_option(evaluation_date, expiry_date, forward_price, strike_price_long, option_type, exercise_type, steps, volatility, yield_curve)
-    option_price_short = comdty_vanilla_option(evaluation_date, expiry_date, forward_price, strike_price_short, option_type, exercise_type, steps, volatility, yield_curve)
-    option_price_long.columns = [f'{option_price_long.columns[0]}_LONG']
-    option_price_short.columns = [f'{option_price_short.columns[0]}_SHORT']
-    structure = pd.DataFrame(option_price_long.values - option_price_short.values, columns=[f'{option_type}_SPREAD'], index=['price', 'delta', 'gamma', 'theta', 'vega', 'rho'])
-    result_frame = pd.concat([option_price_long, option_price_short, structure], axis=1)
-    return result_frame
+    cp = 1.0 if option_type.upper() == 'CALL' else -1.0
+    if exercise_type.upper() != 'AMERICAN':
+        legs = _european_legs(evaluation_date, expiry_date, forward_price, [strike_price_long, strike_price_short], [cp, cp], volatility, yield_curve)
+    else:
+        legs = _american_legs(evaluation_date, expiry_date, forward_price, [strike_price_long, strike_price_short], [cp, cp], steps, volatility, yield_curve)
+    structure = legs @ np.array([1.0, -1.0])
+    return pd.DataFrame(np.column_stack([legs, structure]), columns=[f'{option_type}_LONG', f'{option_type}_SHORT', f'{option_type}_SPREAD'], index=GREEKS_INDEX)
 
 
 def comdty_vanilla_option_collar(evaluation_date: datetime, expiry_date: datetime, forward_price: float, strike_price_call_short: float, strike_price_put_long: float, exercise_type: str, steps: int, volatility: Any,
@@ -133,11 +391,12 @@ def comdty_vanilla_option_collar(evaluation_date: datetime, expiry_date: datetim
     :param yield_curve: Yield term structure
     :return: DataFrame with option price, delta, gamma, theta, vega, rho for both options and the collar
     """
-    call_price = comdty_vanilla_option(evaluation_date, expiry_date, forward_price, strike_price_call_short, 'CALL', exercise_type, steps, volatility, yield_curve)
-    put_price = comdty_vanilla_option(evaluation_date, expiry_date, forward_price, strike_price_put_long, 'PUT', exercise_type, steps, volatility, yield_curve)
-    structure = pd.DataFrame(put_price.values - call_price.values, columns=['COLLAR'], index=['price', 'delta', 'gamma', 'theta', 'vega', 'rho'])
-    result_frame = pd.concat([call_price, put_price, structure], axis=1)
-    return result_frame
+    if exercise_type.upper() != 'AMERICAN':
+        legs = _european_legs(evaluation_date, expiry_date, forward_price, [strike_price_call_short, strike_price_put_long], [1.0, -1.0], volatility, yield_curve)
+    else:
+        legs = _american_legs(evaluation_date, expiry_date, forward_price, [strike_price_call_short, strike_price_put_long], [1.0, -1.0], steps, volatility, yield_curve)
+    structure = legs @ np.array([-1.0, 1.0])
+    return pd.DataFrame(np.column_stack([legs, structure]), columns=['CALL', 'PUT', 'COLLAR'], index=GREEKS_INDEX)
 
 
 def comdty_vanilla_option_butterfly(evaluation_date: datetime, expiry_date: datetime, forward_price: float, strike_price_low_long: float, strike_price_middle_short: float, strike_price_high_long: float, option_type: str,
@@ -157,18 +416,19 @@ def comdty_vanilla_option_butterfly(evaluation_date: datetime, expiry_date: date
     :param yield_curve: Yield term structure
     :return: DataFrame with option price, delta, gamma, theta, vega, rho for all three options and the butterfly spread
     """
-    option_price_low = comdty_vanilla_option(evaluation_date, expiry_date, forward_price, strike_price_low_long, option_type, exercise_type, steps, volatility, yield_curve)
-    option_price_middle = comdty_vanilla_option(evaluation_date, expiry_date, forward_price, strike_price_middle_short, option_type, exercise_type, steps, volatility, yield_curve)
-    option_price_high = comdty_vanilla_option(evaluation_date, expiry_date, forward_price, strike_price_high_long, option_type, exercise_type, steps, volatility, yield_curve)
-    option_price_low.columns = [f'{option_price_low.columns[0]}_LOW']
-    option_price_middle.columns = [f'{option_price_middle.columns[0]}_MIDDLE']
-    option_price_high.columns = [f'{option_price_high.columns[0]}_HIGH']
-    structure = pd.DataFrame(option_price_low.values - 2 * option_price_middle.values + option_price_high.values, columns=[f'{option_type}_BUTTERFLY'], index=['price', 'delta', 'gamma', 'theta', 'vega', 'rho'])
-    result_frame = pd.concat([option_price_low, option_price_middle, option_price_high, structure], axis=1)
-    return result_frame
+    cp = 1.0 if option_type.upper() == 'CALL' else -1.0
+    strike_prices = [strike_price_low_long, strike_price_middle_short, strike_price_high_long]
+    if exercise_type.upper() != 'AMERICAN':
+        legs = _european_legs(evaluation_date, expiry_date, forward_price, strike_prices, [cp, cp, cp], volatility, yield_curve)
+    else:
+        legs = _american_legs(evaluation_date, expiry_date, forward_price, strike_prices, [cp, cp, cp], steps, volatility, yield_curve)
+    structure = legs @ np.array([1.0, -2.0, 1.0])
+    return pd.DataFrame(np.column_stack([legs, structure]), columns=[f'{option_type}_LOW', f'{option_type}_MIDDLE', f'{option_type}_HIGH', f'{option_type}_BUTTERFLY'],
+                        index=GREEKS_INDEX)
 
 
-def comdty_vanilla_option_calendar_spread(evaluation_date: datetime, expiry_date_long: datetime, expiry_date_short: datetime, forward_price: float, strike_price: float, option_type: str, correlation: float, volatility: Any, yield_curve: Any, paths: int):
+def comdty_vanilla_option_calendar_spread(evaluation_date: datetime, expiry_date_long: datetime, expiry_date_short: datetime, forward_price: float, strike_price: float, option_type: str, correlation: float, volatility: Any, yield_curve: Any, paths: int,
+                                          seed: int = None, method: str = 'KIRK', rng: np.random.Generator = None):
     """
         Vanilla commodity option pricing using QuantLib for calendar spread options
     :param evaluation_date: Date of evaluation
@@ -181,6 +441,9 @@ def comdty_vanilla_option_calendar_spread(evaluation_date: datetime, expiry_date
     :param volatility: Volatility term structure
     :param yield_curve: Yield term structure
     :param paths: Number of paths for Monte Carlo simulation
+    :param seed: Seed of the random number generator, fresh entropy if None
+    :param method: 'KIRK' for Kirk's approximation, 'MC' for Monte Carlo simulation
+    :param rng: Random number generator scrambling the Sobol replicates, one PCG64DXSM generator per replicate from seed if None
     :return: DataFrame with the price of vanilla calendar spread and helper values
     """
 
@@ -189,125 +452,145 @@ def comdty_vanilla_option_calendar_spread(evaluation_date: datetime, expiry_date
 
     expiry_date_long = qlu.py_to_ql_date(expiry_date_long)
     expiry_date_short = qlu.py_to_ql_date(expiry_date_short)
-    volatility = ql.BlackVolTermStructureHandle(volatility)
-    yield_curve = ql.YieldTermStructureHandle(yield_curve)
-
-    correlation_matrix = ql.Matrix(2, 2)
-    correlation_matrix[0][0] = 1.0
-    correlation_matrix[1][1] = 1.0
-    correlation_matrix[0][1] = correlation_matrix[1][0] = correlation
 
     volatility_long = volatility.blackVol(expiry_date_long, forward_price)
     volatility_short = volatility.blackVol(expiry_date_short, forward_price)
 
-    volatility_term_structure_long = ql.BlackVolTermStructureHandle(ql.BlackConstantVol(evaluation_date, volatility.calendar(), volatility_long, volatility.dayCounter()))
-    volatility_term_structure_short = ql.BlackVolTermStructureHandle(ql.BlackConstantVol(evaluation_date, volatility.calendar(), volatility_short, volatility.dayCounter()))
-
     riskfree_rate_long = yield_curve.zeroRate(expiry_date_long, yield_curve.dayCounter(),  ql.Continuous, ql.NoFrequency).rate()
     riskfree_rate_short = yield_curve.zeroRate(expiry_date_short, yield_curve.dayCounter(),  ql.Continuous, ql.NoFrequency).rate()
 
-    riskfree_rate_term_structure_long = ql.YieldTermStructureHandle(ql.FlatForward(evaluation_date, riskfree_rate_long, yield_curve.dayCounter()))
-    riskfree_rate_term_structure_short = ql.YieldTermStructureHandle(ql.FlatForward(evaluation_date, riskfree_rate_short, yield_curve.dayCounter()))
-
-    process_long = ql.BlackProcess(ql.QuoteHandle(ql.SimpleQuote(forward_price)), riskfree_rate_term_structure_long, volatility_term_structure_long)
-    process_short = ql.BlackProcess(ql.QuoteHandle(ql.SimpleQuote(forward_price)), riskfree_rate_term_structure_short, volatility_term_structure_short)
-
-    process_array = ql.StochasticProcessArray([process_long, process_short], correlation_matrix)
-
-
     day_counter = yield_curve.dayCounter()
-    expiry_date_min = np.min([expiry_date_long, expiry_date_short])
-    risk_free_rate = riskfree_rate_long if expiry_date_min == expiry_date_long else riskfree_rate_short
+    expiry_date_min = min(expiry_date_long, expiry_date_short)
+    risk_free_rate = riskfree_rate_long if expiry_date_long <= expiry_date_short else riskfree_rate_short
     years_to_maturity = day_counter.yearFraction(evaluation_date, expiry_date_min)
+    cp = 1.0 if option_type.upper() == 'CALL' else -1.0
+    discount_factor = np.exp(-risk_free_rate * years_to_maturity)
 
-    num_steps = max(int(365 * years_to_maturity), 365)
+    # Kirk needs a positive short leg plus strike, otherwise simulate
+    if method.upper() != 'MC' and forward_price + strike_price > 0.0:
+        # base and central difference scenarios for the forward and the volatility of each leg, priced in one vectorised call
+        bump_forward, bump_volatility = 1e-4 * forward_price, 1e-4
+        scenarios = np.array([[0, 0, 0, 0], [1, 0, 0, 0], [-1, 0, 0, 0], [0, 1, 0, 0], [0, -1, 0, 0], [0, 0, 1, 0], [0, 0, -1, 0], [0, 0, 0, 1], [0, 0, 0, -1]], dtype=np.float64)
+        prices = comdty_spread_kirk(forward_price + bump_forward * scenarios[:, 0], forward_price + bump_forward * scenarios[:, 1], strike_price, volatility_long + bump_volatility * scenarios[:, 2],
+                                    volatility_short + bump_volatility * scenarios[:, 3], correlation, years_to_maturity, risk_free_rate, cp)
+        greeks = (prices[1::2] - prices[2::2]) / (2.0 * np.array([bump_forward, bump_forward, bump_volatility, bump_volatility]))
+        return pd.DataFrame([prices[0], prices[0] / discount_factor, riskfree_rate_long, riskfree_rate_short, volatility_long, volatility_short, 0.0, *greeks],
+                            columns=[option_type], index=CALENDAR_SPREAD_INDEX)
+
+    # scipy.stats is slow to import, so only load its Sobol generator when a simulation is requested
+    from scipy.stats import qmc
+
+    # only the terminal values matter, so draw scrambled Sobol points (paths // 2 rounded up to a power of two) split
+    # over independently scrambled replicates, map them to correlated normal pairs and evaluate each pair at Z and -Z
+    pairs = 2 ** int(np.ceil(np.log2(max(int(paths) // 2, 1))))
+    replicates = min(QMC_REPLICATES, pairs)
+    cholesky = np.linalg.cholesky([[1.0, correlation], [correlation, 1.0]])
+    generators = mc_generators(replicates, seed) if rng is None else [rng] * replicates
+    # scrambled points lie on a 2^-30 grid that includes 0, shift them to the cell midpoints to keep ndtri finite
+    uniforms = np.stack([qmc.Sobol(d=2, scramble=True, bits=30, seed=generator).random_base2(int(np.log2(pairs // replicates))) for generator in generators]) + 2.0 ** -31
+    volatilities = np.array([volatility_long, volatility_short])
+    shocks = ndtri(uniforms) @ cholesky.T * volatilities * np.sqrt(years_to_maturity)
+    shocks = np.stack([shocks, -shocks])
+    drift = -0.5 * volatilities ** 2 * years_to_maturity
+
+    contracts = forward_price * np.exp(drift + shocks)
+    payoffs = np.clip(cp * (contracts[..., 0] - contracts[..., 1] - strike_price), 0.0, None).mean(axis=0)
+
+    # pathwise greeks on the same paths: the payoff moves by cp * (+1, -1) times each contract where it is in the money,
+    # and each contract by contract / F per unit of forward and by contract * (Z * sqrt(T) - sigma * T) per unit of volatility
+    in_the_money = cp * (contracts[..., 0] - contracts[..., 1] - strike_price) > 0.0
+    exposures = in_the_money[..., None] * cp * np.array([1.0, -1.0]) * contracts
+    deltas = (exposures / forward_price).mean(axis=(0, 1, 2)) * discount_factor
+    vegas = (exposures * (shocks / volatilities - volatilities * years_to_maturity)).mean(axis=(0, 1, 2)) * discount_factor
+
+    # control variate: the difference of the two terminal forwards has a known expectation of zero,
+    # its coefficient is fitted within each replicate so the replicates stay independent
+    control = (contracts[..., 0] - contracts[..., 1]).mean(axis=0)
+    centred_control = control - control.mean(axis=1, keepdims=True)
+    control_variance = (centred_control ** 2).mean(axis=1)
+    covariance = ((payoffs - payoffs.mean(axis=1, keepdims=True)) * centred_control).mean(axis=1)
+    coefficient = np.divide(covariance, control_variance, out=np.zeros(replicates), where=control_variance > 0.0)
+    estimates = (payoffs - coefficient[:, None] * control).mean(axis=1)
+
+    # the points within a scrambled set are not independent, only the spread of the replicate estimates measures the error
+    payoff = estimates.mean()
+    payoff_standard_error = estimates.std(ddof=1) / np.sqrt(replicates) if replicates > 1 else np.nan
 
-    time_grid = ql.TimeGrid(years_to_maturity, num_steps)
-    random_sequence_generator = ql.GaussianRandomSequenceGenerator(ql.UniformRandomSequenceGenerator(2 * num_steps, ql.UniformRandomGenerator()))
-    gaussian_path_generator = ql.GaussianMultiPathGenerator(process_array, list(time_grid), random_sequence_generator, False)
+    price = payoff * discount_factor
+    standard_error = payoff_standard_error * discount_factor
 
-    contract_long = list()
-    contract_short = list()
-    for _ in range(int(paths)):
-        generated_path = gaussian_path_generator.next().value()
-        contract_long.append(generated_path[0][-1])
-        contract_short.append(generated_path[1][-1])
+    result_frame = pd.DataFrame([price, payoff, riskfree_rate_long, riskfree_rate_short, volatility_long, volatility_short, standard_error, *deltas, *vegas],
+                                columns=[option_type], index=CALENDAR_SPREAD_INDEX)
 
-    contract_long = np.array(contract_long)
-    contract_short = np.array(contract_short)
-    spread = contract_long - contract_short
+    return result_frame
 
-    if option_type.upper() == 'CALL':
-        payoff = np.mean(np.clip(spread - strike_price, a_min=0, a_max=None))
-    else:
-        payoff = np.mean(np.clip(strike_price - spread, a_min=0, a_max=None))
 
-    discount_factor = np.exp(-risk_free_rate * years_to_maturity)
-    price = payoff * discount_factor
+def mc_generators(n: int, seed: int = None):
+    """
+        Independent PCG64DXSM random number generators, one per Monte Carlo task or thread
+    :param n: Number of generators
+    :param seed: Seed of the root seed sequence, fresh entropy if None
+    :return: List of numpy Generators
+    """
+    return [np.random.Generator(np.random.PCG64DXSM(child)) for child in np.random.SeedSequence(seed).spawn(n)]
 
-    result_frame = pd.DataFrame([price, payoff, riskfree_rate_long, riskfree_rate_short, volatility_long, volatility_short],
-                                columns=[option_type], index=['price', 'payoff', 'risk_free_rate_long', 'risk_free_rate_short', 'volatility_long', 'volatility_short'])
 
-    return result_frame
+def comdty_spread_kirk(F1: float, F2: float, K: float, sigma1: float, sigma2: float, rho: float, T: float, r: float, cp: float = 1.0):
+    """
+        Kirk's approximation for an option on the spread F1 - F2 of two correlated lognormal forwards.
+        With a zero strike it reduces to Margrabe's exact exchange option formula.
+    :param F1: Forward price of the long contract
+    :param F2: Forward price of the short contract
+    :param K: Strike price of the spread option, F2 + K must be positive
+    :param sigma1: Volatility of the long contract
+    :param sigma2: Volatility of the short contract
+    :param rho: Correlation between the two contracts
+    :param T: Year fraction to expiry
+    :param r: Continuously compounded risk-free rate to expiry
+    :param cp: 1.0 for CALL, -1.0 for PUT
+    :return: Price of the spread option
+    """
+    weight = F2 / (F2 + K)
+    std_dev = np.sqrt((sigma1 ** 2 - 2.0 * rho * sigma1 * sigma2 * weight + (sigma2 * weight) ** 2) * T)
+    d1 = (np.log(F1 / (F2 + K)) + 0.5 * std_dev ** 2) / std_dev
+    d2 = d1 - std_dev
+    return np.exp(-r * T) * cp * (F1 * ndtr(cp * d1) - (F2 + K) * ndtr(cp * d2))
 
 
-def estimate_vega(option: ql.Option, process: ql.BlackProcess, volatility: ql.BlackVolTermStructureHandle, strike_price: float, expiry_date: ql.Date, steps: int, bump: float = 0.01):
+def estimate_vega(option: ql.Option, volatility_quote: ql.SimpleQuote, bump: float = VEGA_BUMP):
     """
-        Estimates Vega using finite difference method
+        Estimates Vega using central finite difference, bumping the volatility quote the option is priced off.
+        The same engine reprices after each bump, falling back to a one sided difference when the volatility is not above the bump.
     :param option: Option object
-    :param process: Black process object
-    :param volatility: Volatility term structure
-    :param strike_price: Strike price of the option
-    :param expiry_date: Expiry date of the option
-    :param steps: Number of steps for the binomial tree
+    :param volatility_quote: Quote holding the flat volatility of the pricing process
     :param bump: Amount to bump the volatility for finite difference
     :return: Vega of the option"""
 
-    evaluation_date = ql.Settings.instance().evaluationDate
-
-    bumped_vol_up = ql.BlackVolTermStructureHandle(ql.BlackConstantVol(
-         evaluation_date, volatility.calendar(), volatility.blackVol(expiry_date, strike_price) + bump, volatility.dayCounter()))
-    process_up = ql.BlackProcess(ql.QuoteHandle(ql.SimpleQuote(process.x0())), process.riskFreeRate(), bumped_vol_up)
-    engine_up = ql.BinomialCRRVanillaEngine(process_up, int(steps))
-    option.setPricingEngine(engine_up)
+    base_volatility = volatility_quote.value()
+    volatility_down = base_volatility - bump if base_volatility > bump else base_volatility
+    volatility_quote.setValue(base_volatility + bump)
     price_up = option.NPV()
-
-    bumped_vol_down = ql.BlackVolTermStructureHandle(ql.BlackConstantVol(
-        evaluation_date, volatility.calendar(), volatility.blackVol(expiry_date, strike_price) - bump, volatility.dayCounter()))
-    process_down = ql.BlackProcess(ql.QuoteHandle(ql.SimpleQuote(process.x0())), process.riskFreeRate(), bumped_vol_down)
-    engine_down = ql.BinomialCRRVanillaEngine(process_down, int(steps))
-    option.setPricingEngine(engine_down)
+    volatility_quote.setValue(volatility_down)
     price_down = option.NPV()
+    volatility_quote.setValue(base_volatility)
 
-    vega = (price_up - price_down) / (2 * bump)
+    vega = (price_up - price_down) / (base_volatility + bump - volatility_down)
     return vega
 
 
-def estimate_rho(option: ql.Option, process: ql.BlackProcess, yield_curve: ql.YieldTermStructureHandle, volatility: ql.BlackVolTermStructureHandle, expiry_date: ql.Date, steps: int, bump: float = 0.001):
-    """ Estimates Rho using finite difference method
+def estimate_rho(option: ql.Option, riskfree_rate_quote: ql.SimpleQuote, bump: float = RHO_BUMP):
+    """ Estimates Rho using central finite difference, bumping the risk-free rate quote the option is priced off
     :param option: Option object
-    :param process: Black process object
-    :param yield_curve: Yield term structure
-    :param volatility: Volatility term structure
-    :param expiry_date: Expiry date of the option
-    :param steps: Number of steps for the binomial tree
+    :param riskfree_rate_quote: Quote holding the flat risk-free rate of the pricing process
     :param bump: Amount to bump the yield for finite difference
     :return: Rho of the option"""
 
-    evaluation_date = ql.Settings.instance().evaluationDate
-    base_rate = yield_curve.zeroRate(expiry_date, yield_curve.dayCounter(), ql.Continuous).rate()
-
-    bumped_yield_up = ql.FlatForward(evaluation_date, base_rate + bump, yield_curve.dayCounter())
-    process_up = ql.BlackProcess(ql.QuoteHandle(ql.SimpleQuote(process.x0())), ql.YieldTermStructureHandle(bumped_yield_up), volatility)
-    engine_up = ql.BinomialCRRVanillaEngine(process_up, int(steps))
-    option.setPricingEngine(engine_up)
+    base_rate = riskfree_rate_quote.value()
+    riskfree_rate_quote.setValue(base_rate + bump)
     price_up = option.NPV()
-
-    bumped_yield_down = ql.FlatForward(evaluation_date, base_rate - bump, yield_curve.dayCounter())
-    process_down = ql.BlackProcess(ql.QuoteHandle(ql.SimpleQuote(process.x0())), ql.YieldTermStructureHandle(bumped_yield_down), volatility)
-    engine_down = ql.BinomialCRRVanillaEngine(process_down, int(steps))
-    option.setPricingEngine(engine_down)
+    riskfree_rate_quote.setValue(base_rate - bump)
     price_down = option.NPV()
+    riskfree_rate_quote.setValue(base_rate)
 
-    rho = (price_up - price_down)/(2 * bump)
+    rho = (price_up - price_down) / (2.0 * bump)
     return rho
@@ -4,8 +4,10 @@
     Description: Utility functions for QuantLib
 """
 
+import numpy as np
 import QuantLib as ql
 from datetime import datetime
+from functools import lru_cache
 
 DAY_COUNTERS = {
     'SIMPLE': ql.SimpleDayCounter(),
@@ -76,6 +78,7 @@ DATE_GENERATION = {
 }
 
 
+@lru_cache(maxsize=None)
 def ql_date_generation(rule: str):
     """
         Convert a string to a QuantLib date generation rule.
@@ -85,6 +88,7 @@ def ql_date_generation(rule: str):
     return DATE_GENERATION[rule.upper()]
 
 
+@lru_cache(maxsize=None)
 def ql_weekday_correction(correction: str):
     """
         Convert a string to a QuantLib weekday correction rule.
@@ -94,6 +98,7 @@ def ql_weekday_correction(correction: str):
     return WEEKDAY_CORRECTION[correction.upper()]
 
 
+@lru_cache(maxsize=None)
 def ql_calendar(calendar: str):
     """
         Convert a string to a QuantLib calendar.
@@ -103,6 +108,7 @@ def ql_calendar(calendar: str):
     return CALENDARS[calendar.upper()]
 
 
+@lru_cache(maxsize=None)
 def ql_day_counter(day_counter: str):
     """
         Convert a string to a QuantLib day counter.
@@ -112,6 +118,7 @@ def ql_day_counter(day_counter: str):
     return DAY_COUNTERS[day_counter.upper()]
 
 
+@lru_cache(maxsize=None)
 def ql_period(period: str):
     """
         Convert a string to a QuantLib period.
@@ -121,6 +128,7 @@ def ql_period(period: str):
     return ql.Period(period)
 
 
+@lru_cache(maxsize=None)
 def ql_compounding(compounding: str):
     """
         Convert a string to a QuantLib compounding method.
@@ -130,6 +138,7 @@ def ql_compounding(compounding: str):
     return COMPOUNDING[compounding.upper()]
 
 
+@lru_cache(maxsize=None)
 def ql_frequency(frequency):
     """
         Convert a string to a QuantLib frequency.
@@ -139,6 +148,7 @@ def ql_frequency(frequency):
     return FREQUENCIES[frequency.upper()]
 
 
+@lru_cache(maxsize=None)
 def ql_date_generation(date_generation: str):
     """
         Convert a string to a QuantLib date generation rule.
@@ -148,13 +158,43 @@ def ql_date_generation(date_generation: str):
     return DATE_GENERATION[date_generation.upper()]
 
 
+@lru_cache(maxsize=100_000)
+def _ql_date(year: int, month: int, day: int):
+    """
+        Create a QuantLib date, memoised as the same dates recur across calls.
+    :param year: year
+    :param month: month
+    :param day: day of month
+    :return: QuantLib date
+    """
+    return ql.Date(day, month, year)
+
+
 def py_to_ql_date(date: datetime):
     """
         Convert a Python datetime object to a QuantLib date.
     :param date: datetime object
     :return: QuantLib date
     """
-    return ql.Date(date.day, date.month, date.year)
+    return _ql_date(date.year, date.month, date.day)
+
+
+def py_to_ql_dates_batch(dates):
+    """
+        Convert a sequence of dates to QuantLib dates. numpy datetime64 arrays are split into
+        year, month and day in one vectorised pass, every date goes through the memoised constructor.
+    :param dates: numpy datetime64 array or sequence of datetime objects
+    :return: List of QuantLib dates
+    """
+    dates = np.ravel(dates)
+    if np.issubdtype(dates.dtype, np.datetime64):
+        days = dates.astype('datetime64[D]')
+        months = days.astype('datetime64[M]')
+        years = months.astype('datetime64[Y]').astype(np.int64) + 1970
+        month_numbers = months.astype(np.int64) % 12 + 1
+        day_numbers = (days - months).astype(np.int64) + 1
+        return [_ql_date(year, month, day) for year, month, day in zip(years.tolist(), month_numbers.tolist(), day_numbers.tolist())]
+    return [_ql_date(date.year, date.month, date.day) for date in dates]
 
 
 def ql_to_py_date(date: ql.Date):
@@ -40,12 +40,9 @@ def black_variance_surface(evaluation_date: datetime, calendar: str, expirations
     """
     evaluation_date = qlu.py_to_ql_date(evaluation_date)
     calendar = qlu.ql_calendar(calendar)
-    expirations = [qlu.py_to_ql_date(date) for date in expirations]
+    expirations = qlu.py_to_ql_dates_batch(expirations)
     day_counter = qlu.ql_day_counter(day_counter)
-    ql_volatility_matrix = ql.Matrix(len(strike_pries), len(expirations))
-    for row in range(volatility_matrix.shape[0]):
-        for col in range(volatility_matrix.shape[1]):
-            ql_volatility_matrix[row][col] = volatility_matrix[row, col]
+    ql_volatility_matrix = ql.Matrix(np.asarray(volatility_matrix, dtype=np.float64).tolist())
     surface = ql.BlackVarianceSurface(evaluation_date, calendar,  expirations, strike_pries, ql_volatility_matrix, day_counter)
     return surface
 
@@ -61,3 +58,18 @@ def volatility_from_surface(surface: ql.BlackVarianceSurface, expiry_date: datet
     expiration = qlu.py_to_ql_date(expiry_date)
     volatility = surface.blackVol(expiration, strike_price)
     return volatility
+
+
+def volatility_from_surface_vec(surface: ql.BlackVarianceSurface, expiry_dates: List[datetime], strike_prices: List[float]):
+    """
+        Get the volatilities from the Black variance surface for a grid of expiries and strikes.
+        Times to expiry are computed once per expiry rather than once per point.
+    :param surface: Variance surface object
+    :param expiry_dates: List of expiration dates
+    :param strike_prices: List of strike prices
+    :return: 2D numpy array of volatilities with one row per expiry and one column per strike
+    """
+    times = [surface.timeFromReference(qlu.py_to_ql_date(date)) for date in expiry_dates]
+    strike_prices = [float(strike) for strike in strike_prices]
+    volatilities = np.fromiter((surface.blackVol(time, strike) for time in times for strike in strike_prices), dtype=np.float64, count=len(times) * len(strike_prices))
+    return volatilities.reshape(len(times), len(strike_prices))
@@ -4,12 +4,19 @@
     Description: Yield curve models for QuantLib
 """
 
+import weakref
 import numpy as np
 import QuantLib as ql
 from typing import List
 from datetime import datetime
+from collections import OrderedDict
 import QuantSpace.libs.qlutils as qlu
 
+ZERO_RATES_CACHE_SIZE = 512
+# keyed on weak references, so a cached curve can still be collected; its entries are evicted when it is
+_zero_rates_cache = OrderedDict()
+_zero_rates_curves = weakref.WeakSet()
+
 
 def forward_curve(dates: List[datetime], rates: List[datetime], day_counter: str, calendar: str):
     """
@@ -20,7 +27,7 @@ def forward_curve(dates: List[datetime], rates: List[datetime], day_counter: str
     :param calendar: calendar name
     :return: Forward curve object
     """
-    dates = [qlu.py_to_ql_date(date) for date in dates]
+    dates = qlu.py_to_ql_dates_batch(dates)
     day_counter = qlu.ql_day_counter(day_counter)
     calendar = qlu.ql_calendar(calendar)
     yield_curve = ql.ForwardCurve(dates, rates, day_counter, calendar)
@@ -46,14 +53,65 @@ def flat_forward(date: datetime, rate: float, day_counter: str, compounding: str
 
 def zero_rates(yield_curve, dates, day_counter, compounding):
     """
-        Get the zero rates from the yield curve.
+        Get the zero rates from the yield curve. Results are cached per curve object, evaluation date and inputs,
+        call invalidate_zero_rates if a curve is modified in place.
     :param yield_curve: Yield curve object
     :param dates: Dates for the zero rates
     :param day_counter: Day counter name
     :param compounding: Compounding method
     :return: Array of zero rates
     """
-    dates = [qlu.py_to_ql_date(date) for date in dates]
-    day_counter = qlu.ql_day_counter(day_counter)
-    compounding = qlu.ql_compounding(compounding)
-    return np.array([yield_curve.zeroRate(date, day_counter, compounding).rate() for date in dates])
+    key = (weakref.ref(yield_curve), ql.Settings.instance().evaluationDate.serialNumber(), tuple(dates), day_counter, compounding)
+    cached = _zero_rates_cache.get(key)
+    if cached is not None:
+        _zero_rates_cache.move_to_end(key)
+        return cached
+
+    ql_dates = qlu.py_to_ql_dates_batch(dates)
+    ql_day_counter = qlu.ql_day_counter(day_counter)
+    ql_compounding = qlu.ql_compounding(compounding)
+
+    # one discount call per date, converted to zero rates in NumPy (annual frequency, as zeroRate defaults to)
+    reference_date = yield_curve.referenceDate()
+    compound = 1.0 / np.fromiter((yield_curve.discount(date) for date in ql_dates), dtype=np.float64, count=len(ql_dates))
+    times = np.fromiter((ql_day_counter.yearFraction(reference_date, date) for date in ql_dates), dtype=np.float64, count=len(ql_dates))
+    rates = np.empty(len(ql_dates))
+    on_reference = times == 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if ql_compounding == ql.Simple:
+            rates[:] = (compound - 1.0) / times
+        elif ql_compounding == ql.Compounded:
+            rates[:] = compound ** (1.0 / times) - 1.0
+        else:
+            rates[:] = np.log(compound) / times
+    for i in np.flatnonzero(on_reference):
+        rates[i] = yield_curve.zeroRate(ql_dates[i], ql_day_counter, ql_compounding).rate()
+    rates.setflags(write=False)
+
+    if yield_curve not in _zero_rates_curves:
+        _zero_rates_curves.add(yield_curve)
+        weakref.finalize(yield_curve, _evict_collected_zero_rates)
+    _zero_rates_cache[key] = rates
+    if len(_zero_rates_cache) > ZERO_RATES_CACHE_SIZE:
+        _zero_rates_cache.popitem(last=False)
+    return rates
+
+
+def invalidate_zero_rates(yield_curve=None):
+    """
+        Drop cached zero rates of a yield curve.
+    :param yield_curve: Yield curve object, all cached zero rates are dropped if None
+    :return: Number of cached entries dropped
+    """
+    keys = list(_zero_rates_cache) if yield_curve is None else [key for key in _zero_rates_cache if key[0]() is yield_curve]
+    for key in keys:
+        del _zero_rates_cache[key]
+    return len(keys)
+
+
+def _evict_collected_zero_rates():
+    """
+        Drop cached zero rates whose curve has been garbage collected.
+    """
+    for key in [key for key in _zero_rates_cache if key[0]() is None]:
+        del _zero_rates_cache[key]
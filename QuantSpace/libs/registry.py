@@ -0,0 +1,42 @@
+"""
+    Author: julij
+    Date: 15/10/2026
+    Description: Registry of QuantLib objects referenced by string handles
+"""
+
+import itertools
+import weakref
+import numpy as np
+from typing import Any
+
+_objects = weakref.WeakValueDictionary()
+# ids are reused once an object is collected, the counter keeps a stale handle from resolving to its successor
+_counter = itertools.count()
+
+
+def register(obj: Any):
+    """
+        Register an object and return a string handle referencing it. The registry only holds a weak
+        reference, the handle expires once the object is no longer referenced elsewhere.
+    :param obj: Object to register, e.g. a yield curve or volatility surface
+    :return: String handle of the object
+    """
+    handle = f'{type(obj).__name__}@{id(obj):x}.{next(_counter)}'
+    _objects[handle] = obj
+    return handle
+
+
+def resolve(handle_or_object: Any):
+    """
+        Resolve a string handle to the registered object, anything else is returned unchanged.
+    :param handle_or_object: String handle (possibly as a 1x1 array) or the object itself
+    :return: Registered object
+    """
+    if isinstance(handle_or_object, np.ndarray) and handle_or_object.size == 1:
+        handle_or_object = handle_or_object.item()
+    if not isinstance(handle_or_object, str):
+        return handle_or_object
+    try:
+        return _objects[handle_or_object]
+    except KeyError:
+        raise KeyError(f'Unknown or expired handle: {handle_or_object}')
@@ -0,0 +1,61 @@
+"""
+    Author: julij
+    Date: 15/10/2026
+    Description: Regression checks of the compiled Black-76 paths against QuantLib's AnalyticEuropeanEngine
+"""
+
+import numpy as np
+import QuantLib as ql
+from datetime import datetime
+import QuantSpace.libs.qloptions as qloptions
+
+EVALUATION_DATE = datetime(2025, 5, 5)
+EXPIRY_DATES = [datetime(2025, 11, 20), datetime(2027, 5, 5)]
+FORWARD_PRICE = 100.0
+STRIKE_PRICES = [95.0, 105.0]
+
+
+def _market():
+    """
+        Volatility on ACT/ACT and yield curve on ACT/360, so variance time and discounting time differ
+    :return: Tuple of volatility term structure and yield term structure
+    """
+    reference_date = ql.Date(EVALUATION_DATE.day, EVALUATION_DATE.month, EVALUATION_DATE.year)
+    volatility = ql.BlackConstantVol(reference_date, ql.UnitedKingdom(), 0.3, ql.ActualActual(ql.ActualActual.ISDA))
+    yield_curve = ql.FlatForward(reference_date, 0.05, ql.Actual360())
+    return volatility, yield_curve
+
+
+def _quantlib_greeks(expiry_date: datetime, strike_price: float, option_type: str, volatility: ql.BlackVolTermStructure, yield_curve: ql.YieldTermStructure):
+    """
+        Price and greeks of a European option from QuantLib's analytic engine
+    :return: Array with option price, delta, gamma, theta, vega, rho
+    """
+    ql.Settings.instance().evaluationDate = ql.Date(EVALUATION_DATE.day, EVALUATION_DATE.month, EVALUATION_DATE.year)
+    process = ql.BlackProcess(ql.QuoteHandle(ql.SimpleQuote(FORWARD_PRICE)), ql.YieldTermStructureHandle(yield_curve), ql.BlackVolTermStructureHandle(volatility))
+    option_type_ql = ql.Option.Call if option_type == 'CALL' else ql.Option.Put
+    option = ql.EuropeanOption(ql.PlainVanillaPayoff(option_type_ql, strike_price), ql.EuropeanExercise(ql.Date(expiry_date.day, expiry_date.month, expiry_date.year)))
+    option.setPricingEngine(ql.AnalyticEuropeanEngine(process))
+    return np.array([option.NPV(), option.delta(), option.gamma(), option.theta(), option.vega(), option.rho()])
+
+
+def test_european_greeks_with_mismatched_day_counters():
+    volatility, yield_curve = _market()
+    for option_type in ('CALL', 'PUT'):
+        cp = 1.0 if option_type == 'CALL' else -1.0
+        chain = qloptions.comdty_vanilla_option_chain(EVALUATION_DATE, np.array(EXPIRY_DATES, dtype=object)[:, None], FORWARD_PRICE, np.array(STRIKE_PRICES), option_type, volatility, yield_curve)
+        batch = qloptions.comdty_vanilla_option_batch(EVALUATION_DATE, np.repeat(np.array(EXPIRY_DATES, dtype=object), len(STRIKE_PRICES)), FORWARD_PRICE, np.tile(STRIKE_PRICES, len(EXPIRY_DATES)),
+                                                      option_type, 'EUROPEAN', 100, volatility, yield_curve)
+        for i, expiry_date in enumerate(EXPIRY_DATES):
+            legs = qloptions._european_legs(EVALUATION_DATE, expiry_date, FORWARD_PRICE, STRIKE_PRICES, [cp] * len(STRIKE_PRICES), volatility, yield_curve)
+            for j, strike_price in enumerate(STRIKE_PRICES):
+                expected = _quantlib_greeks(expiry_date, strike_price, option_type, volatility, yield_curve)
+                scalar = qloptions.comdty_vanilla_option_greeks(EVALUATION_DATE, expiry_date, FORWARD_PRICE, strike_price, option_type, 'EUROPEAN', 100, volatility, yield_curve)
+                np.testing.assert_allclose(scalar, expected, rtol=1e-9, atol=1e-10)
+                np.testing.assert_allclose([chain[name][i, j] for name in qloptions.GREEKS_INDEX], expected, rtol=1e-9, atol=1e-10)
+                np.testing.assert_allclose(legs[:, j], expected, rtol=1e-9, atol=1e-10)
+                np.testing.assert_allclose(batch.values[i * len(STRIKE_PRICES) + j], expected, rtol=1e-9, atol=1e-10)
+
+
+if __name__ == '__main__':
+    test_european_greeks_with_mismatched_day_counters()